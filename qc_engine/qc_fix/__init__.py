@@ -1,7 +1,5 @@
-
-import json, base64
 from azure.functions import HttpRequest, HttpResponse
-from . import utils
+from .. import utils
 
 PROFILES_PATH = __import__('os').path.join(__import__('os').path.dirname(__file__), '..', 'rules', 'profiles.json')
 
@@ -18,8 +16,8 @@ async def main(req: HttpRequest) -> HttpResponse:
     if not content_b64:
         return HttpResponse('Provide contentBase64 for sample', status_code=400)
 
-    data = base64.b64decode(content_b64).decode('utf-8', errors='replace')
-    profiles = utils.load_profiles(PROFILES_PATH)
+    data = utils.b64decode(content_b64)
+    profiles = utils.get_profiles(PROFILES_PATH)
     profile = profiles['profiles'].get(profile_name)
     if not profile:
         return HttpResponse('Unknown profile', status_code=400)
@@ -37,9 +35,9 @@ async def main(req: HttpRequest) -> HttpResponse:
     fixed_srt = utils.serialize_srt(subs)
 
     return HttpResponse(
-        json.dumps({
+        utils.json_dumps({
             'fixedFileUrl': 'inline://fixed.srt',
-            'fixedFileBase64': base64.b64encode(fixed_srt.encode('utf-8')).decode('ascii'),
+            'fixedFileBase64': utils.b64encode_str(fixed_srt.encode('utf-8')),
             'changes': changes
         }),
         mimetype='application/json'
@@ -1,43 +1,59 @@
+import asyncio
 import os
-import json
-import base64
 import binascii
+import gzip
 import logging
 import pathlib
+import secrets
 import traceback
 import time
-import uuid
-from typing import Any, Dict, Optional, Tuple
+from types import MappingProxyType
+from typing import Any, Dict, Iterator, Optional, Tuple
 
 from azure.functions import HttpRequest, HttpResponse
-from . import utils
+from .. import utils
 
 # In a real deployment you would fetch the file from SharePoint/Blob via SAS URL.
 # For this sample we accept a base64 payload or inline text for demonstration.
 
-GUIDELINE_SOURCES = {
-    'Netflix-SV': [
+GUIDELINE_SOURCES = MappingProxyType({
+    'Netflix-SV': (
         'https://partnerhelp.netflixstudios.com/hc/en-us/articles/216014517-Swedish-Timed-Text-Style-Guide',
         'https://partnerhelp.netflixstudios.com/hc/en-us/articles/215758617-Timed-Text-Style-Guide-General-Requirements'
-    ],
-    'SVT-SE': [
-        'https://www.medietextarna.se/wp-content/uploads/2024/12/Riktlinjer-for-undertextning-i-Sverige-v2.pdf'
-    ],
-    'NRK-NO': [
-        'https://sprakradet.no/godt-og-korrekt-sprak/praktisk-sprakbruk/retningslinjer-for-god-teksting-i-norge/'
-    ],
-    'DR-DK': [
-        'https://undertekstning.dk/'
-    ],
-    'Yle-FI (fi)': [
-        'https://kieliasiantuntijat.fi/wp/wp-content/uploads/2023/06/Quality-Recommendations-for-Finnish-Subtitling.pdf'
-    ],
-    'Yle-FI (sv)': [
-        'https://kieliasiantuntijat.fi/wp/wp-content/uploads/2023/06/Quality-Recommendations-for-Finnish-Subtitling.pdf'
-    ]
-}
+    ),
+    'SVT-SE': (
+        'https://www.medietextarna.se/wp-content/uploads/2024/12/Riktlinjer-for-undertextning-i-Sverige-v2.pdf',
+    ),
+    'NRK-NO': (
+        'https://sprakradet.no/godt-og-korrekt-sprak/praktisk-sprakbruk/retningslinjer-for-god-teksting-i-norge/',
+    ),
+    'DR-DK': (
+        'https://undertekstning.dk/',
+    ),
+    'Yle-FI (fi)': (
+        'https://kieliasiantuntijat.fi/wp/wp-content/uploads/2023/06/Quality-Recommendations-for-Finnish-Subtitling.pdf',
+    ),
+    'Yle-FI (sv)': (
+        'https://kieliasiantuntijat.fi/wp/wp-content/uploads/2023/06/Quality-Recommendations-for-Finnish-Subtitling.pdf',
+    )
+})
 
 PROFILES_PATH = os.path.join(os.path.dirname(__file__), '..', 'rules', 'profiles.json')
+# Resolved once at import; used for both the file write and the file:// URL
+REPORT_PATH = str(pathlib.Path(os.path.dirname(__file__), '..', 'report_sample.html').resolve())
+
+# Environment flags are read once per worker; app settings changes restart the host anyway
+_DEBUG_RESPONSES = os.getenv("DEBUG_RESPONSES", "false").lower() in ("1", "true", "yes")
+_PERSIST_REPORT = os.getenv("PERSIST_REPORT", "false").lower() in ("1", "true", "yes")
+
+# Responses smaller than this are sent uncompressed even if the client accepts gzip
+_GZIP_MIN_BYTES = 1024
+
+# Base64 is decoded in slices of this many chars (a multiple of 4, so each slice decodes on its own)
+_B64_CHUNK_CHARS = 64 * 1024
+
+# Upper bound on a "data:<mime>[;params];base64," prefix
+_DATA_URL_PREFIX_MAX = 512
 
 # ---------- Logging Setup ----------
 def _get_logger() -> logging.Logger:
@@ -52,16 +68,52 @@ def _get_logger() -> logging.Logger:
 logger = _get_logger()
 
 # ---------- Helpers ----------
+def _accepts_gzip(accept_encoding: str) -> bool:
+    """True when an Accept-Encoding value allows gzip: listed (or covered by '*') with q > 0."""
+    gzip_q: Optional[float] = None
+    star_q: Optional[float] = None
+    for item in accept_encoding.lower().split(','):
+        coding, _, params = item.partition(';')
+        coding = coding.strip()
+        if coding not in ('gzip', 'x-gzip', '*'):
+            continue
+        q = 1.0
+        for param in params.split(';'):
+            name, _, value = param.partition('=')
+            if name.strip() == 'q':
+                try:
+                    q = float(value.strip())
+                except ValueError:
+                    q = 0.0
+        if coding == '*':
+            star_q = q
+        else:
+            gzip_q = q if gzip_q is None else max(gzip_q, q)
+    # an explicit gzip entry (including q=0) overrides the wildcard
+    if gzip_q is not None:
+        return gzip_q > 0
+    return star_q is not None and star_q > 0
+
 def _json_response(
     status: int,
     payload: Dict[str, Any],
-    correlation_id: Optional[str] = None
+    correlation_id: Optional[str] = None,
+    *,
+    accept_encoding: Optional[str] = None
 ) -> HttpResponse:
     headers = {'Content-Type': 'application/json'}
     if correlation_id:
         headers['X-Correlation-Id'] = correlation_id
         payload.setdefault('correlationId', correlation_id)
-    return HttpResponse(json.dumps(payload, ensure_ascii=False), status_code=status, headers=headers)
+    body = utils.json_dumps(payload)
+    if accept_encoding is not None:
+        # The body depends on the request's Accept-Encoding whether or not it ends up compressed
+        headers['Vary'] = 'Accept-Encoding'
+        # The inline report and issue list compress well; only bother for non-trivial bodies
+        if len(body) >= _GZIP_MIN_BYTES and _accepts_gzip(accept_encoding):
+            body = gzip.compress(body, compresslevel=6)
+            headers['Content-Encoding'] = 'gzip'
+    return HttpResponse(body, status_code=status, headers=headers)
 
 def _err(
     status: int,
@@ -71,9 +123,8 @@ def _err(
     correlation_id: Optional[str] = None,
     exc: Optional[Exception] = None
 ) -> HttpResponse:
-    debug = os.getenv("DEBUG_RESPONSES", "false").lower() in ("1", "true", "yes")
     body: Dict[str, Any] = {"errorCode": error_code, "message": message}
-    if debug and exc is not None:
+    if _DEBUG_RESPONSES and exc is not None:
         body["details"] = {
             "type": type(exc).__name__,
             "args": getattr(exc, "args", None),
@@ -89,11 +140,11 @@ def _safe_len(s: Optional[str]) -> int:
     except Exception:
         return -1
 
-def _decode_base64_content(raw_b64: str, correlation_id: str) -> str:
-    """Decode base64 content with robust handling & logging. Returns UTF-8 text (errors replaced)."""
-    t0 = time.perf_counter()
-    # Allow and strip data-URL prefix if present
-    prefix_idx = raw_b64.find(";base64,")
+def _iter_base64_content(raw_b64: str, correlation_id: str) -> Iterator[bytes]:
+    """Lazily decode base64 content in fixed-size slices with robust handling & logging. Yields raw bytes; UTF-8 decoding is left to utils.load_subtitles."""
+    # Allow and strip data-URL prefix if present. It can only sit at the head
+    # of the payload, so bound the search instead of scanning the whole body.
+    prefix_idx = raw_b64.find(";base64,", 0, _DATA_URL_PREFIX_MAX)
     if prefix_idx != -1:
         logger.debug(
             "Stripping data URL prefix before base64 decoding",
@@ -101,19 +152,12 @@ def _decode_base64_content(raw_b64: str, correlation_id: str) -> str:
         )
         raw_b64 = raw_b64[prefix_idx + len(";base64,"):]
 
+    decoded_len = 0
     try:
-        decoded_bytes = base64.b64decode(raw_b64, validate=True)
-        text = decoded_bytes.decode("utf-8", errors="replace")
-        logger.info(
-            "Base64 decoded successfully",
-            extra={
-                "event": "base64_decoded",
-                "correlationId": correlation_id,
-                "decodedBytes": len(decoded_bytes),
-                "durationMs": int((time.perf_counter() - t0) * 1000),
-            },
-        )
-        return text
+        for i in range(0, len(raw_b64), _B64_CHUNK_CHARS):
+            chunk = utils.b64decode(raw_b64[i:i + _B64_CHUNK_CHARS], validate=True)
+            decoded_len += len(chunk)
+            yield chunk
     except binascii.Error as e:
         logger.error(
             "Invalid base64 content",
@@ -125,34 +169,43 @@ def _decode_base64_content(raw_b64: str, correlation_id: str) -> str:
             },
         )
         raise e
+    if logger.isEnabledFor(logging.INFO):
+        logger.info(
+            "Base64 decoded successfully",
+            extra={
+                "event": "base64_decoded",
+                "correlationId": correlation_id,
+                "decodedBytes": decoded_len,
+            },
+        )
 
 def _load_profiles(path: str, correlation_id: str) -> Dict[str, Any]:
     t0 = time.perf_counter()
-    path_obj = pathlib.Path(path)
-    if not path_obj.exists():
+    if not os.path.exists(path):
         logger.error(
             "Profiles file not found",
-            extra={"event": "profiles_missing", "correlationId": correlation_id, "path": str(path_obj)}
+            extra={"event": "profiles_missing", "correlationId": correlation_id, "path": path}
         )
-        raise FileNotFoundError(f"Profiles file not found at {path_obj}")
+        raise FileNotFoundError(f"Profiles file not found at {path}")
 
     try:
-        profiles = utils.load_profiles(str(path_obj))
+        profiles = utils.get_profiles(path)
         if "profiles" not in profiles or not isinstance(profiles["profiles"], dict):
             logger.error(
                 "Profiles JSON malformed or missing 'profiles' key",
                 extra={"event": "profiles_malformed", "correlationId": correlation_id}
             )
             raise ValueError("Profiles JSON does not contain a valid 'profiles' object")
-        logger.info(
-            "Profiles loaded",
-            extra={
-                "event": "profiles_loaded",
-                "correlationId": correlation_id,
-                "availableProfiles": list(profiles["profiles"].keys()),
-                "durationMs": int((time.perf_counter() - t0) * 1000),
-            },
-        )
+        if logger.isEnabledFor(logging.INFO):
+            logger.info(
+                "Profiles loaded",
+                extra={
+                    "event": "profiles_loaded",
+                    "correlationId": correlation_id,
+                    "availableProfiles": list(profiles["profiles"].keys()),
+                    "durationMs": int((time.perf_counter() - t0) * 1000),
+                },
+            )
         return profiles
     except Exception as e:
         logger.error(
@@ -176,7 +229,11 @@ def _validate_profile(profiles: Dict[str, Any], profile_name: str, correlation_i
         raise KeyError(f"Unknown profile: {profile_name}")
     return profiles["profiles"][profile_name]
 
-def _run_qc_and_report(
+def _write_report(path: str, report_html: str) -> None:
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(report_html)
+
+async def _run_qc_and_report(
     subs, fmt, profile, profile_name: str, correlation_id: str
 ) -> Tuple[Any, Any, str]:
     # Run QC
@@ -186,61 +243,69 @@ def _run_qc_and_report(
 
     # Generate HTML report
     t_html = time.perf_counter()
-    sources = GUIDELINE_SOURCES.get(profile_name, [])
+    sources = GUIDELINE_SOURCES.get(profile_name, ())
     report_html = utils.generate_html_report(issues, metrics, profile_name, sources)
     html_ms = int((time.perf_counter() - t_html) * 1000)
 
-    # Persist sample report (local)
-    report_path = os.path.join(os.path.dirname(__file__), '..', 'report_sample.html')
-    try:
-        with open(report_path, 'w', encoding='utf-8') as f:
-            f.write(report_html)
-    except OSError as e:
-        logger.error(
-            "Failed to write report file",
-            exc_info=True,
+    # Persisting the sample report (local) is opt-in; by default it is returned inline
+    if _PERSIST_REPORT:
+        report_path = REPORT_PATH
+        try:
+            # Write off the event loop so concurrent invocations are not blocked on disk I/O
+            await asyncio.to_thread(_write_report, report_path, report_html)
+        except OSError as e:
+            logger.error(
+                "Failed to write report file",
+                exc_info=True,
+                extra={
+                    "event": "report_write_failed",
+                    "correlationId": correlation_id,
+                    "reportPath": report_path,
+                },
+            )
+            raise e
+        report_url = 'file://' + report_path
+    else:
+        report_path = None
+        report_url = 'data:text/html;base64,' + utils.b64encode_str(report_html.encode('utf-8'))
+    if logger.isEnabledFor(logging.INFO):
+        logger.info(
+            "QC and report generated",
             extra={
-                "event": "report_write_failed",
+                "event": "qc_complete",
                 "correlationId": correlation_id,
-                "reportPath": str(pathlib.Path(report_path).resolve()),
+                "issuesCount": len(issues) if isinstance(issues, list) else "n/a",
+                "metricsKeys": list(metrics.keys()) if isinstance(metrics, dict) else "n/a",
+                "qcDurationMs": qc_ms,
+                "htmlDurationMs": html_ms,
+                "reportPath": report_path,
             },
         )
-        raise e
-    logger.info(
-        "QC and report generated",
-        extra={
-            "event": "qc_complete",
-            "correlationId": correlation_id,
-            "issuesCount": len(issues) if isinstance(issues, list) else "n/a",
-            "metricsKeys": list(metrics.keys()) if isinstance(metrics, dict) else "n/a",
-            "qcDurationMs": qc_ms,
-            "htmlDurationMs": html_ms,
-            "reportPath": str(pathlib.Path(report_path).resolve()),
-        },
-    )
-    return issues, metrics, report_path
+    return issues, metrics, report_url
 
 # ---------- Main Function ----------
 async def main(req: HttpRequest) -> HttpResponse:
-    correlation_id = req.headers.get("X-Correlation-Id") or str(uuid.uuid4())
+    correlation_id = req.headers.get("X-Correlation-Id") or secrets.token_hex(16)
     overall_t0 = time.perf_counter()
 
     try:
         # Log request metadata without PII/content
-        logger.info(
-            "Request received",
-            extra={
-                "event": "request_received",
-                "correlationId": correlation_id,
-                "method": getattr(req, "method", "UNKNOWN"),
-                "contentLength": int(req.headers.get("Content-Length", "0") or 0),
-                "contentType": req.headers.get("Content-Type", "unknown"),
-            },
-        )
+        if logger.isEnabledFor(logging.INFO):
+            logger.info(
+                "Request received",
+                extra={
+                    "event": "request_received",
+                    "correlationId": correlation_id,
+                    "method": getattr(req, "method", "UNKNOWN"),
+                    "contentLength": int(req.headers.get("Content-Length", "0") or 0),
+                    "contentType": req.headers.get("Content-Type", "unknown"),
+                },
+            )
 
         # Parse JSON body
         try:
-            body = req.get_json()
+            # Parse the raw body ourselves; get_json() always goes through stdlib json
+            body = utils.json_loads(req.get_body())
         except Exception as e:
             logger.error(
                 "Invalid JSON in request body",
@@ -255,18 +320,19 @@ async def main(req: HttpRequest) -> HttpResponse:
         content_b64 = body.get('contentBase64')
         filename = body.get('filename', 'input.srt')
 
-        logger.debug(
-            "Parsed request fields",
-            extra={
-                "event": "request_fields",
-                "correlationId": correlation_id,
-                "hasContentBase64": bool(content_b64),
-                "fileUrlProvided": bool(file_url),
-                "profile": profile_name,
-                "filename": filename,
-                "contentBase64Length": _safe_len(content_b64),
-            },
-        )
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(
+                "Parsed request fields",
+                extra={
+                    "event": "request_fields",
+                    "correlationId": correlation_id,
+                    "hasContentBase64": bool(content_b64),
+                    "fileUrlProvided": bool(file_url),
+                    "profile": profile_name,
+                    "subtitleFilename": filename,
+                    "contentBase64Length": _safe_len(content_b64),
+                },
+            )
 
         if not content_b64 and not file_url:
             logger.warning(
@@ -275,12 +341,12 @@ async def main(req: HttpRequest) -> HttpResponse:
             )
             return _err(400, "NoContent", "Provide fileUrl or contentBase64", correlation_id=correlation_id)
 
-        # For the sample, prefer contentBase64
+        # For the sample, prefer contentBase64. Decoding is streamed into the
+        # parser, so invalid base64 surfaces while loading subtitles below.
         if content_b64:
-            try:
-                data = _decode_base64_content(content_b64, correlation_id)
-            except Exception as e:
-                return _err(400, "InvalidBase64", "contentBase64 is not valid base64 data", correlation_id, e)
+            if not isinstance(content_b64, str):
+                return _err(400, "InvalidBase64", "contentBase64 must be a base64 string", correlation_id=correlation_id)
+            data = _iter_base64_content(content_b64, correlation_id)
         else:
             logger.info(
                 "URL fetch not allowed in sample",
@@ -293,6 +359,34 @@ async def main(req: HttpRequest) -> HttpResponse:
                 correlation_id=correlation_id
             )
 
+        # Load subtitles before the profile checks, so a bad upload is reported
+        # as such regardless of the profile, as with the former up-front decode
+        try:
+            t_load = time.perf_counter()
+            subs, fmt = utils.load_subtitles(data, filename)
+            load_ms = int((time.perf_counter() - t_load) * 1000)
+            subs_count = len(subs) if hasattr(subs, "__len__") else "n/a"
+            if logger.isEnabledFor(logging.INFO):
+                logger.info(
+                    "Subtitles parsed",
+                    extra={
+                        "event": "subs_loaded",
+                        "correlationId": correlation_id,
+                        "format": fmt,
+                        "subsCount": subs_count,
+                        "durationMs": load_ms,
+                    },
+                )
+        except binascii.Error as e:
+            return _err(400, "InvalidBase64", "contentBase64 is not valid base64 data", correlation_id=correlation_id, exc=e)
+        except Exception as e:
+            logger.error(
+                "Failed to parse subtitles",
+                exc_info=True,
+                extra={"event": "subs_parse_failed", "correlationId": correlation_id, "subtitleFilename": filename}
+            )
+            return _err(400, "SubtitleParseError", f"Failed to parse subtitles from {filename}", correlation_id=correlation_id, exc=e)
+
         # Load profiles
         try:
             profiles = _load_profiles(PROFILES_PATH, correlation_id)
@@ -312,35 +406,11 @@ async def main(req: HttpRequest) -> HttpResponse:
             )
             return _err(500, "ProfileValidationError", "Failed to validate profile", correlation_id=correlation_id, exc=e)
 
-        # Load subtitles
-        try:
-            t_load = time.perf_counter()
-            subs, fmt = utils.load_subtitles(data, filename)
-            load_ms = int((time.perf_counter() - t_load) * 1000)
-            subs_count = len(subs) if hasattr(subs, "__len__") else "n/a"
-            logger.info(
-                "Subtitles parsed",
-                extra={
-                    "event": "subs_loaded",
-                    "correlationId": correlation_id,
-                    "format": fmt,
-                    "subsCount": subs_count,
-                    "durationMs": load_ms,
-                },
-            )
-        except Exception as e:
-            logger.error(
-                "Failed to parse subtitles",
-                exc_info=True,
-                extra={"event": "subs_parse_failed", "correlationId": correlation_id, "filename": filename}
-            )
-            return _err(400, "SubtitleParseError", f"Failed to parse subtitles from {filename}", correlation_id, e)
-
         # QC + Report
         try:
-            issues, metrics, report_path = _run_qc_and_report(subs, fmt, profile, profile_name, correlation_id)
+            issues, metrics, report_url = await _run_qc_and_report(subs, fmt, profile, profile_name, correlation_id)
         except Exception as e:
-            return _err(500, "QCRunError", "Failed to run QC or generate report", correlation_id, e)
+            return _err(500, "QCRunError", "Failed to run QC or generate report", correlation_id=correlation_id, exc=e)
 
         # Build response
         preview = ""
@@ -354,20 +424,22 @@ async def main(req: HttpRequest) -> HttpResponse:
             'issues': issues,
             'metrics': metrics,
             'preview': preview,
-            'reportUrl': 'file://' + str(pathlib.Path(report_path).resolve()),
+            'reportUrl': report_url,
             'normalizedFileUrl': 'inline://not-persisted-in-sample'
         }
 
-        logger.info(
-            "Request completed successfully",
-            extra={
-                "event": "request_success",
-                "correlationId": correlation_id,
-                "totalDurationMs": int((time.perf_counter() - overall_t0) * 1000),
-                "issuesCount": len(issues) if isinstance(issues, list) else "n/a",
-            },
-        )
-        return _json_response(200, resp, correlation_id=correlation_id)
+        if logger.isEnabledFor(logging.INFO):
+            logger.info(
+                "Request completed successfully",
+                extra={
+                    "event": "request_success",
+                    "correlationId": correlation_id,
+                    "totalDurationMs": int((time.perf_counter() - overall_t0) * 1000),
+                    "issuesCount": len(issues) if isinstance(issues, list) else "n/a",
+                },
+            )
+        accept_encoding = req.headers.get("Accept-Encoding", "")
+        return _json_response(200, resp, correlation_id=correlation_id, accept_encoding=accept_encoding)
 
     except Exception as e:
         # Last-resort catch-all
@@ -377,3 +449,16 @@ async def main(req: HttpRequest) -> HttpResponse:
             extra={"event": "unhandled_exception", "correlationId": correlation_id}
         )
         return _err(500, "UnhandledError", "An unexpected error occurred", correlation_id=correlation_id, exc=e)
+
+# ---------- Cold-start warmup ----------
+def _warmup() -> None:
+    """Fill the profiles cache and run the parse/QC/report path once at import, so the first request doesn't pay for it."""
+    try:
+        profiles = _load_profiles(PROFILES_PATH, "warmup")
+        subs, _ = utils.load_subtitles("1\n00:00:00,000 --> 00:00:00,100\n.\n\n", "warmup.srt")
+        issues, metrics = utils.run_qc(subs, next(iter(profiles["profiles"].values()), {}))
+        utils.generate_html_report(issues, metrics, "warmup", [])
+    except Exception:
+        logger.warning("Cold-start warmup failed", exc_info=True, extra={"event": "warmup_failed"})
+
+_warmup()
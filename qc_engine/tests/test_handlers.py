@@ -0,0 +1,102 @@
+
+import asyncio, base64, gzip, json
+import pytest
+from qc_engine import utils
+from qc_engine import qc_run as run_mod
+from qc_engine import qc_fix as fix_mod
+
+SRT = """1
+00:00:01,000 --> 00:00:02,000
+- Hej!
+- Tjena!
+
+"""
+
+class DummyReq:
+    def __init__(self, d, headers=None):
+        self._d = d
+        self.headers = headers or {}
+    def get_json(self):
+        return self._d
+    def get_body(self):
+        return json.dumps(self._d).encode('utf-8')
+
+def _b64(text):
+    return base64.b64encode(text.encode('utf-8')).decode('ascii')
+
+def test_handlers_share_one_profiles_cache():
+    assert run_mod.utils is utils and fix_mod.utils is utils
+    utils._load_profiles_cached.cache_clear()
+    run_mod._warmup()
+    for _ in range(2):
+        req = DummyReq({"profile": "NRK-NO", "autoFixMode": "safe-only", "contentBase64": _b64(SRT), "filename": "a.srt"})
+        assert asyncio.run(fix_mod.main(req)).status_code == 200
+        req = DummyReq({"profile": "Netflix-SV", "contentBase64": _b64(SRT), "filename": "a.srt"})
+        assert asyncio.run(run_mod.main(req)).status_code == 200
+    # qc_run's warmup load serves every later request from both handlers
+    info = utils._load_profiles_cached.cache_info()
+    assert info.misses == 1
+    assert info.hits == 4
+
+def _run(d, headers=None):
+    resp = asyncio.run(run_mod.main(DummyReq(d, headers)))
+    return resp, json.loads(resp.get_body())
+
+def test_run_invalid_base64():
+    for content, profile in [("@@not base64@@", "Netflix-SV"),
+                             ("@@not base64@@", "No-Such-Profile"),
+                             (12345, "Netflix-SV"),
+                             (["MQo="], "Netflix-SV")]:
+        resp, body = _run({"profile": profile, "contentBase64": content, "filename": "x.srt"})
+        assert resp.status_code == 400, content
+        assert body["errorCode"] == "InvalidBase64", content
+
+def test_run_unknown_profile_with_valid_upload():
+    resp, body = _run({"profile": "No-Such-Profile", "contentBase64": _b64(SRT), "filename": "x.srt"})
+    assert resp.status_code == 400
+    assert body["errorCode"] == "UnknownProfile"
+
+@pytest.mark.parametrize("header,expected", [
+    ("gzip", True),
+    ("GZIP, br", True),
+    ("gzip;q=0", False),
+    ("gzip; q=0.0, br", False),
+    ("gzip;q=0.5", True),
+    ("*", True),
+    ("*;q=0", False),
+    ("gzip;q=0, *", False),
+    ("*, gzip;q=0", False),
+    ("x-gzip", True),
+    ("identity", False),
+    ("deflate, br", False),
+    ("gzip;q=", False),
+    ("gzip;q=abc", False),
+    ("", False),
+])
+def test_accepts_gzip(header, expected):
+    assert run_mod._accepts_gzip(header) is expected
+
+def _sized_payload(n):
+    # serializes to exactly n bytes
+    return {"x": "a" * (n - len(utils.json_dumps({"x": ""})))}
+
+def test_json_response_gzip_threshold_and_vary():
+    limit = run_mod._GZIP_MIN_BYTES
+    small = run_mod._json_response(200, _sized_payload(limit - 1), accept_encoding="gzip")
+    assert small.headers.get("Vary") == "Accept-Encoding"
+    assert "Content-Encoding" not in small.headers
+    assert len(small.get_body()) == limit - 1
+
+    big = run_mod._json_response(200, _sized_payload(limit), accept_encoding="gzip")
+    assert big.headers.get("Vary") == "Accept-Encoding"
+    assert big.headers.get("Content-Encoding") == "gzip"
+    assert json.loads(gzip.decompress(big.get_body())) == _sized_payload(limit)
+
+    refused = run_mod._json_response(200, _sized_payload(limit * 4), accept_encoding="gzip;q=0")
+    assert refused.headers.get("Vary") == "Accept-Encoding"
+    assert "Content-Encoding" not in refused.headers
+
+    # not negotiated at all: no Vary either
+    plain = run_mod._json_response(200, _sized_payload(limit * 4))
+    assert "Vary" not in plain.headers
+    assert "Content-Encoding" not in plain.headers
@@ -8,6 +8,8 @@ class DummyReq:
         self._d = d
     def get_json(self):
         return self._d
+    def get_body(self):
+        return json.dumps(self._d).encode('utf-8')
 
 async def test_run_qc_event_loop():
     srt = """1
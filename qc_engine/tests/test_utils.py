@@ -0,0 +1,128 @@
+
+import pytest
+from qc_engine import utils
+
+SRT = """1
+00:00:01,000 --> 00:00:02,500
+Hej då, världen!
+Två rader här.
+
+2
+00:00:03,000 --> 00:00:04,000
+Blåbär och smörgås
+
+3
+00:00:05,000 --> 00:00:06,000
+Sista raden
+"""
+
+def _cues(subs):
+    return [(s.index, s.start_ms, s.end_ms, s.lines) for s in subs]
+
+def _split(data, size):
+    return [data[i:i+size] for i in range(0, len(data), size)]
+
+def test_iter_srt_cues_chunked_matches_whole_text():
+    whole = _cues(utils.parse_srt(SRT))
+    assert len(whole) == 3
+    assert whole[-1][3] == ['Sista raden']
+    raw = SRT.encode('utf-8')
+    for size in (1, 2, 3, 7, 64):
+        assert _cues(utils.iter_srt_cues(_split(raw, size))) == whole
+        assert _cues(utils.iter_srt_cues(_split(SRT, size))) == whole
+
+def test_iter_srt_cues_crlf_and_multibyte_split_across_chunks():
+    crlf = SRT.replace('\n', '\r\n').encode('utf-8')
+    whole = _cues(utils.parse_srt(SRT))
+    # every cut point, so each '\r\n' pair and each 'å'/'ä'/'ö' byte pair is split once
+    for cut in range(1, len(crlf)):
+        assert _cues(utils.iter_srt_cues([crlf[:cut], crlf[cut:]])) == whole
+
+def test_iter_srt_cues_large_input_without_separators():
+    # whitespace-only lines do not end a block, so this is one huge block
+    block = "1\n00:00:01,000 --> 00:00:02,000\n" + "rad\n \n" * 400000
+    raw = block.encode('utf-8')
+    subs = list(utils.iter_srt_cues(_split(raw, 64 * 1024)))
+    assert len(subs) == 1
+    assert len(subs[0].lines) == 400000
+
+def test_parse_vtt_blocks_and_trailing_whitespace():
+    vtt = ("WEBVTT\n\n"
+           "cue-1\n00:00:01.000 --> 00:00:02.500 align:start\nFörsta raden  \n \nAndra raden\n\n\n\n"
+           "NOTE utan tid\n\n"
+           "00:00:03.000 --> 00:00:04.000\nSista  \n   \n")
+    # whitespace-only lines are dropped without ending the cue; only the
+    # document's final line loses its trailing whitespace
+    assert _cues(utils.parse_vtt(vtt)) == [
+        (1, 1000, 2500, ['Första raden  ', 'Andra raden']),
+        (2, 3000, 4000, ['Sista']),
+    ]
+    assert _cues(utils.parse_vtt(vtt.replace('\n', '\r\n'))) == _cues(utils.parse_vtt(vtt))
+    assert utils.parse_vtt("WEBVTT\n\n") == []
+
+def test_parse_ttml_streams_cues():
+    ttml = ('<?xml version="1.0" encoding="UTF-16"?>\n'
+            '<tt xmlns="http://www.w3.org/ns/ttml" xmlns:tts="http://www.w3.org/ns/ttml#styling"><body><div>'
+            '<p begin="00:00:01.000" end="00:00:02.500"><span tts:color="red">Hej</span>\n  <span>då</span><br/>igen</p>'
+            '<p begin="1s">ingen slut</p>'
+            '<p begin="3.0" end="4.0">  a\tb </p>'
+            '</div></body></tt>')
+    # str input, so the encoding declaration is ignored; cues without an end are skipped
+    assert _cues(utils.parse_ttml(ttml)) == [
+        (1, 1000, 2500, ['Hej dåigen']),
+        (2, 3000, 4000, ['a b']),
+    ]
+    old_ns = '<tt xmlns="http://www.w3.org/2006/10/ttaf1"><body><div><p begin="1.0" end="2.0">gammal</p></div></body></tt>'
+    assert _cues(utils.parse_ttml(old_ns)) == [(1, 1000, 2000, ['gammal'])]
+
+def test_parse_ttml_large_deck_across_feed_chunks():
+    n = 5000
+    ttml = ('<tt xmlns="http://www.w3.org/ns/ttml"><body><div>'
+            + ''.join('<p begin="%d.0" end="%d.5"><span>cue</span> %d</p>' % (i, i, i) for i in range(n))
+            + '</div></body></tt>')
+    assert len(ttml) > 2 * utils._XML_FEED_CHARS
+    subs = utils.parse_ttml(ttml)
+    assert len(subs) == n
+    assert _cues(subs[-1:]) == [(n, (n - 1) * 1000, (n - 1) * 1000 + 500, ['cue %d' % (n - 1)])]
+
+def test_parse_ttml_malformed_raises():
+    with pytest.raises(utils.ET.ParseError):
+        utils.parse_ttml('<tt><p begin="1.0" end="2.0">open')
+    with pytest.raises(utils.ET.ParseError):
+        utils.parse_ttml('')
+
+@pytest.mark.parametrize("line,max_cpl,expected", [
+    ("Det här är en mycket lång rad som bryter", 16, ['Det här är en', 'mycket lång rad', 'som bryter']),
+    ("abcdefghijklmnop", 5, ['abcde', 'fghij', 'klmno', 'p']),
+    (" ledande mellanslag här", 8, ['', 'ledande', 'mellansl', 'ag här']),
+    ("ord  \t  med   luft emellan", 6, ['ord', 'med', 'luft', 'emella', 'n']),
+    ("xxxxxxxxxx yyy", 10, ['xxxxxxxxxx', 'yyy']),
+])
+def test_reflow_cuts(line, max_cpl, expected):
+    out = []
+    utils._reflow(line, max_cpl, out)
+    assert out == expected
+
+def test_safe_fixes_reflows_long_line():
+    subs = utils.parse_srt("1\n00:00:01,000 --> 00:00:04,000\nDet här är en mycket lång rad som bryter mot gränsen\n")
+    utils.safe_fixes(subs, {'maxCpl': 20})
+    # more than two wrapped lines are folded back into the second line
+    assert subs[0].lines == ['Det här är en', 'mycket lång rad som bryter mot gränsen']
+
+@pytest.mark.parametrize("ts,expected", [
+    ("00:00:00,000", 0),
+    ("01:02:03,456", 3723456),
+    ("  12:34:56,789 ", 45296789),
+    # not the fixed HH:MM:SS,mmm layout: handled by the regex path
+    ("1:02:03,4", 3723004),
+    ("100:00:00,000", 360000000),
+    ("00:00:01,0005", 1005),
+    ("٠١:02:03,456", 3723456),
+])
+def test_parse_timestamp_srt(ts, expected):
+    assert utils.parse_timestamp_srt(ts) == expected
+
+@pytest.mark.parametrize("ts", ["00:00:01.000", "+1:02:03,456", "0_:00:01,000", "00:00:01,00x", ""])
+def test_parse_timestamp_srt_invalid(ts):
+    with pytest.raises(ValueError):
+        utils.parse_timestamp_srt(ts)
@@ -1,11 +1,45 @@
 
-import re, os, io, json, math, html
+import re, os, io, json, math, html, functools, codecs
 from datetime import timedelta
-from xml.etree import ElementTree as ET
+try:
+    # C-backed parser; the stdlib ElementTree fallback exposes the same API used here
+    from lxml import etree as ET
+    # tag='{*}p' lets lxml report only cue paragraphs (any namespace) from C
+    _XML_PULL_KWARGS = {'resolve_entities': False, 'no_network': True, 'tag': '{*}p'}
+except ImportError:
+    from xml.etree import ElementTree as ET
+    _XML_PULL_KWARGS = {}
+# Shared by both handlers and load_profiles; json_dumps returns UTF-8 bytes
+try:
+    from orjson import dumps as json_dumps, loads as json_loads
+except ImportError:
+    def json_dumps(obj):
+        # same compact, non-ASCII-preserving output as orjson
+        return json.dumps(obj, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+    json_loads = json.loads
+try:
+    import pybase64  # SIMD-accelerated, API-compatible with stdlib base64
+    # Encodes straight to str, skipping the intermediate bytes object
+    b64encode_str = pybase64.b64encode_as_string
+except ImportError:
+    import base64 as pybase64
+
+    def b64encode_str(data):
+        return pybase64.b64encode(data).decode('ascii')
+b64decode = pybase64.b64decode
 
 TIME_RE = re.compile(r"^(\d+):(\d+):(\d+),(\d+)$")
+_INDEX_RE = re.compile(r"^\d+$")
+_ELLIPSIS_WS_RE = re.compile(r"\s*…\s*")
+
+# Resolved once instead of a codec registry lookup per decode
+_UTF8_DECODE = codecs.getdecoder('utf-8')
+_UTF8_INCREMENTAL = codecs.getincrementaldecoder('utf-8')
 
 class Subtitle:
+    __slots__ = ('index', 'start_ms', 'end_ms', 'lines')
+
     def __init__(self, index, start_ms, end_ms, lines):
         self.index = index
         self.start_ms = start_ms
@@ -14,8 +48,7 @@ class Subtitle:
 
     @property
     def text(self):
-        return "
-".join(self.lines)
+        return "\n".join(self.lines)
 
     @property
     def duration_ms(self):
@@ -23,137 +56,236 @@ class Subtitle:
 
 
 def parse_timestamp_srt(ts: str) -> int:
-    m = TIME_RE.match(ts.strip())
+    ts = ts.strip()
+    # Fixed-layout HH:MM:SS,mmm read by position; anything else goes through TIME_RE
+    if len(ts) == 12 and ts[2] == ':' and ts[5] == ':' and ts[8] == ',' and ts.isascii():
+        h, m_, s, ms = ts[0:2], ts[3:5], ts[6:8], ts[9:12]
+        if h.isdigit() and m_.isdigit() and s.isdigit() and ms.isdigit():
+            return ((int(h)*60 + int(m_)) * 60 + int(s)) * 1000 + int(ms)
+    m = TIME_RE.match(ts)
     if not m:
         raise ValueError(f"Invalid SRT timestamp: {ts}")
     h, m_, s, ms = map(int, m.groups())
     return ((h*60 + m_) * 60 + s) * 1000 + ms
 
 
-def parse_srt(text: str):
-    subs = []
-    blocks = re.split(r"?
-?
-", text.strip(), flags=re.M)
+def _parse_srt_block(b: str, idx: int):
+    lines = [l for l in b.splitlines() if l.strip() != ""]
+    if len(lines) >= 2:
+        # First line may be index
+        i0 = 0
+        if _INDEX_RE.match(lines[0].strip()):
+            i0 = 1
+        timing = lines[i0]
+        if '-->' not in timing:
+            return None
+        t1, t2 = [t.strip() for t in timing.split('-->')]
+        start = parse_timestamp_srt(t1)
+        end = parse_timestamp_srt(t2.split()[0])
+        content = lines[i0+1:]
+        return Subtitle(idx, start, end, content)
+    return None
+
+
+def iter_srt_cues(chunks):
+    """Parse SRT incrementally from an iterable of str or UTF-8 bytes chunks.
+
+    Only the cue block currently being assembled is buffered, so peak memory is
+    bounded by the largest cue block rather than the file. Yields the same cues
+    as parsing the whole text at once.
+    """
+    decoder = _UTF8_INCREMENTAL('replace')
+    parts = []  # fragments of the block being assembled; no '\n\n' among them
+    carry = ''  # trailing '\r' that may pair with a '\n' at the start of the next chunk
+    pending = None  # last non-blank block, held back in case it ends the file
     idx = 0
-    for b in blocks:
-        lines = [l for l in b.splitlines() if l.strip() != ""]
-        if len(lines) >= 2:
-            # First line may be index
-            i0 = 0
-            if re.match(r"^\d+$", lines[0].strip()):
-                i0 = 1
-            timing = lines[i0]
-            if '-->' not in timing:
-                continue
-            t1, t2 = [t.strip() for t in timing.split('-->')]
-            start = parse_timestamp_srt(t1)
-            end = parse_timestamp_srt(t2.split()[0])
-            content = lines[i0+1:]
+    started = False
+
+    def flush(block):
+        nonlocal idx
+        sub = _parse_srt_block(block, idx + 1)
+        if sub is not None:
             idx += 1
-            subs.append(Subtitle(idx, start, end, content))
-    return subs
+        return sub
+
+    def feed(chunk, final=False):
+        nonlocal parts, carry, pending, started
+        if not isinstance(chunk, str):
+            chunk = decoder.decode(chunk, final)
+        chunk = carry + chunk
+        carry = ''
+        if not final and chunk.endswith('\r'):
+            chunk, carry = chunk[:-1], '\r'
+        # normalize CRLF per chunk so cue blocks split on a plain '\n\n'
+        if '\r' in chunk:
+            chunk = chunk.replace('\r\n', '\n')
+        if not started:
+            # leading whitespace of the whole document is insignificant
+            chunk = chunk.lstrip()
+            if not chunk:
+                return
+            started = True
+        blocks = []
+        if parts and parts[-1].endswith('\n') and chunk.startswith('\n'):
+            # separator straddles the chunk boundary
+            parts[-1] = parts[-1][:-1]
+            blocks.append(''.join(parts))
+            parts = []
+            chunk = chunk[1:]
+        # only the new chunk is scanned; earlier fragments are known separator-free
+        pieces = chunk.split('\n\n')
+        rest = pieces.pop()
+        if pieces:
+            parts.append(pieces[0])
+            blocks.append(''.join(parts))
+            blocks.extend(pieces[1:])
+            parts = []
+        if rest:
+            parts.append(rest)
+        for block in blocks:
+            if block.strip():
+                if pending is not None:
+                    yield pending
+                pending = block
+
+    for chunk in chunks:
+        for block in feed(chunk):
+            sub = flush(block)
+            if sub is not None:
+                yield sub
+    for block in feed(b'', final=True):
+        sub = flush(block)
+        if sub is not None:
+            yield sub
+    # as with whole-text parsing, trailing whitespace of the document is dropped
+    tail = [b for b in (pending, ''.join(parts)) if b is not None and b.strip()]
+    for i, block in enumerate(tail):
+        sub = flush(block.rstrip() if i == len(tail) - 1 else block)
+        if sub is not None:
+            yield sub
+
+
+def parse_srt(text: str):
+    return list(iter_srt_cues((text,)))
+
+
+def _parse_vtt_ts(ts: str) -> int:
+    ts = ts.split()[0]
+    hh, mm, ss_ms = ts.split(':')
+    if '.' in ss_ms:
+        ss, ms = ss_ms.split('.')
+        ms = int(ms[:3].ljust(3, '0'))
+    else:
+        ss, ms = ss_ms, '000'
+    return ((int(hh)*60 + int(mm))*60 + int(ss))*1000 + int(ms)
+
+
+def _parse_vtt_block(lns, idx: int):
+    # VTT may have an optional cue id line
+    i0 = 0
+    timing_line = None
+    for k in range(min(2, len(lns))):
+        if '-->' in lns[k]:
+            timing_line = lns[k]
+            i0 = k
+            break
+    if not timing_line:
+        return None
+    t1, t2 = [t.strip() for t in timing_line.split('-->')]
+    start = _parse_vtt_ts(t1)
+    end = _parse_vtt_ts(t2)
+    content = lns[i0+1:]
+    return Subtitle(idx, start, end, content)
 
 
 def parse_vtt(text: str):
+    # One pass over the lines: an empty line ends a cue block, while blank
+    # (whitespace-only) and WEBVTT header lines are dropped without ending it
     subs = []
-    lines = text.splitlines()
-    lines = [l for l in lines if not l.strip().startswith('WEBVTT')]
-    buf = []
-    for line in lines:
-        buf.append(line)
-    blocks = re.split(r"?
-?
-", "
-".join(buf).strip())
-    idx = 0
-    for b in blocks:
-        lns = [l for l in b.splitlines() if l.strip()]
-        if not lns:
-            continue
-        # VTT may have an optional cue id line
-        i0 = 0
-        timing_line = None
-        for k in range(min(2, len(lns))):
-            if '-->' in lns[k]:
-                timing_line = lns[k]
-                i0 = k
-                break
-        if not timing_line:
-            continue
-        t1, t2 = [t.strip() for t in timing_line.split('-->')]
-        def parse_vtt_ts(ts):
-            ts = ts.split()[0]
-            hh, mm, ss_ms = ts.split(':')
-            if '.' in ss_ms:
-                ss, ms = ss_ms.split('.')
-                ms = int((ms + '000')[:3])
-            else:
-                ss, ms = ss_ms, '000'
-            return ((int(hh)*60 + int(mm))*60 + int(ss))*1000 + int(ms)
-        start = parse_vtt_ts(t1)
-        end = parse_vtt_ts(t2)
-        content = lns[i0+1:]
-        idx += 1
-        subs.append(Subtitle(idx, start, end, content))
+    block = []
+    pending = None  # last complete block, held back in case it ends the file
+    for line in text.splitlines():
+        if not line:
+            if block:
+                if pending is not None:
+                    sub = _parse_vtt_block(pending, len(subs) + 1)
+                    if sub is not None:
+                        subs.append(sub)
+                pending, block = block, []
+        elif line.strip() and not line.lstrip().startswith('WEBVTT'):
+            block.append(line)
+    if block:
+        if pending is not None:
+            sub = _parse_vtt_block(pending, len(subs) + 1)
+            if sub is not None:
+                subs.append(sub)
+        pending = block
+    if pending is not None:
+        # trailing whitespace of the document is insignificant
+        pending[-1] = pending[-1].rstrip()
+        sub = _parse_vtt_block(pending, len(subs) + 1)
+        if sub is not None:
+            subs.append(sub)
     return subs
 
 
-def parse_ttml(text: str):
-    subs = []
-    ns = {
-        'tt':'http://www.w3.org/ns/ttml',
-        'p':'http://www.w3.org/ns/ttml#parameter',
-        'tts':'http://www.w3.org/ns/ttml#styling'
-    }
-    try:
-        root = ET.fromstring(text)
-    except ET.ParseError:
-        # Try without namespaces
-        root = ET.fromstring(text)
+def _parse_clock(c: str) -> int:
+    # supports HH:MM:SS.mmm or SS.mmm or time in seconds with 's'
+    c = c.strip()
+    if c.endswith('s'):
+        return int(float(c[:-1])*1000)
+    if ':' in c:
+        parts = c.split(':')
+        hh=int(parts[0]); mm=int(parts[1]);
+        ss_ms = parts[2]
+        if '.' in ss_ms:
+            ss, ms = ss_ms.split('.')
+            ms = int(ms[:3].ljust(3, '0'))
+        else:
+            ss, ms = ss_ms, '000'
+        return ((hh*60+mm)*60+int(ss))*1000+int(ms)
+    if '.' in c:
+        ss, ms = c.split('.')
+        return int(float(ss+'.'+ms)*1000)
+    return int(float(c)*1000)
+
+
+_XML_FEED_CHARS = 64 * 1024
+
+
+def _collect_ttml_cues(events, subs):
     # Support both tt and imsc style ttml
-    # search for all <p> regardless of prefix
-    idx = 0
-    for p in root.iter():
-        tag = p.tag.split('}')[-1]
-        if tag != 'p':
+    # match <p> regardless of prefix
+    for _, p in events:
+        tag = p.tag
+        if not isinstance(tag, str) or not (tag == 'p' or tag.endswith('}p')):
             continue
         begin = p.attrib.get('begin')
         end = p.attrib.get('end')
-        if not begin or not end:
-            continue
-        def parse_clock(c):
-            # supports HH:MM:SS.mmm or SS.mmm or time in seconds with 's'
-            c = c.strip()
-            if c.endswith('s'):
-                return int(float(c[:-1])*1000)
-            if ':' in c:
-                parts = c.split(':')
-                hh=int(parts[0]); mm=int(parts[1]);
-                ss_ms = parts[2]
-                if '.' in ss_ms:
-                    ss, ms = ss_ms.split('.')
-                    ms = int((ms + '000')[:3])
-                else:
-                    ss, ms = ss_ms, '000'
-                return ((hh*60+mm)*60+int(ss))*1000+int(ms)
-            if '.' in c:
-                ss, ms = c.split('.')
-                return int(float(ss+'.'+ms)*1000)
-            return int(float(c)*1000)
-        start = parse_clock(begin)
-        endt = parse_clock(end)
-        # collect text (join spans)
-        text_lines = []
-        # split by <br/> into lines
-        raw = ''.join(p.itertext())
-        # replace multiple spaces
-        raw = re.sub(r"\s+", ' ', raw).strip()
-        text_lines = raw.split('
-') if '
-' in raw else [raw]
-        idx += 1
-        subs.append(Subtitle(idx, start, endt, text_lines))
+        if begin and end:
+            start = _parse_clock(begin)
+            endt = _parse_clock(end)
+            # collect text (join spans), collapsing every whitespace run to one space;
+            # that also folds newlines, so each cue ends up as a single line
+            text_lines = [' '.join(''.join(p.itertext()).split())]
+            subs.append(Subtitle(len(subs) + 1, start, endt, text_lines))
+        # Finished cues are dropped so the tree never holds more than the open path
+        p.clear()
+        if hasattr(p, 'getprevious'):
+            # lxml keeps cleared siblings attached to the parent; detach them too
+            while p.getprevious() is not None:
+                del p.getparent()[0]
+
+
+def parse_ttml(text: str):
+    # Fed as str slices: both backends then ignore the encoding declaration
+    parser = ET.XMLPullParser(events=('end',), **_XML_PULL_KWARGS)
+    subs = []
+    for pos in range(0, len(text), _XML_FEED_CHARS):
+        parser.feed(text[pos:pos + _XML_FEED_CHARS])
+        _collect_ttml_cues(parser.read_events(), subs)
+    parser.close()
+    _collect_ttml_cues(parser.read_events(), subs)
     return subs
 
 
@@ -161,9 +293,10 @@ def detect_format(text: str, filename: str):
     name = filename.lower()
     if name.endswith('.srt'):
         return 'srt'
-    if name.endswith('.vtt') or 'WEBVTT' in text[:20]:
+    # bounded find() scans the head in place instead of slicing a copy of it
+    if name.endswith('.vtt') or text.find('WEBVTT', 0, 20) != -1:
         return 'vtt'
-    if name.endswith('.xml') or name.endswith('.ttml') or '<tt' in text[:200]:
+    if name.endswith(('.xml', '.ttml')) or text.find('<tt', 0, 200) != -1:
         return 'ttml'
     if name.endswith('.pac'):
         return 'pac'
@@ -173,7 +306,17 @@ def detect_format(text: str, filename: str):
     return 'unknown'
 
 
-def load_subtitles(text: str, filename: str):
+def load_subtitles(data, filename: str):
+    # Accept decoded upload bytes directly so callers don't have to hold a
+    # second full-size str copy; invalid UTF-8 is replaced, as before.
+    if isinstance(data, (bytes, bytearray, memoryview)):
+        data = _UTF8_DECODE(data, 'replace')[0]
+    elif not isinstance(data, str):
+        # Iterable of byte chunks: SRT streams cue by cue; other formats need the whole document
+        if detect_format('', filename) == 'srt':
+            return list(iter_srt_cues(data)), 'srt'
+        data = _UTF8_DECODE(b''.join(data), 'replace')[0]
+    text = data
     fmt = detect_format(text, filename)
     if fmt == 'srt':
         return parse_srt(text), fmt
@@ -189,8 +332,22 @@ def load_subtitles(text: str, filename: str):
 # --- Profiles ---
 
 def load_profiles(path: str):
-    with open(path, 'r', encoding='utf-8') as f:
-        return json.load(f)
+    # read raw bytes; both loaders decode UTF-8 themselves
+    with open(path, 'rb') as f:
+        return json_loads(f.read())
+
+
+@functools.lru_cache(maxsize=1)
+def _load_profiles_cached(path: str, mtime_ns: int):
+    return load_profiles(path)
+
+
+def get_profiles(path: str):
+    # Shared by qc_run and qc_fix: parsed once per worker and reused until the
+    # file changes on disk. Callers must treat the result as read-only.
+    # Each handler builds its own '<handler>/../rules' path, so key on the real path.
+    path = os.path.realpath(path)
+    return _load_profiles_cached(path, os.stat(path).st_mtime_ns)
 
 # --- QC checks ---
 
@@ -205,66 +362,103 @@ def run_qc(subs, profile):
     total_chars = 0
     total_duration = 0
     over_cps = 0
+    # profile settings are per run, not per cue
+    min_d = profile.get('minDurationSec')
+    max_d = profile.get('maxDurationSec')
+    min_ms = min_d*1000 if min_d else None
+    max_ms = max_d*1000 if max_d else None
+    target_cps = profile.get('targetCps')
+    max_lines = profile.get('maxLines', 2)
+    max_cpl = profile.get('maxCpl')
+    min_cpl = profile.get('minCpl')
+    check_ellipsis = bool(profile.get('ellipsis', {}))
+    check_dual_dash = profile.get('dualSpeakerDash')
+    issues_append = issues.append
     for s in subs:
-        total_chars += len(s.text)
-        total_duration += s.duration_ms
+        lines = s.lines
+        n_lines = len(lines)
+        # same as len(s.text), without joining the lines into a new string
+        n_chars = sum(map(len, lines)) + n_lines - 1 if lines else 0
+        dur = s.duration_ms
+        total_chars += n_chars
+        total_duration += dur
         # duration checks
-        min_d = profile.get('minDurationSec')
-        max_d = profile.get('maxDurationSec')
-        if min_d and s.duration_ms < min_d*1000:
-            issues.append({"type":"duration-too-short","severity":"warning","index":s.index,"time":s.start_ms,
-                           "message":f"Duration {s.duration_ms}ms below {min_d}s"})
-        if max_d and s.duration_ms > max_d*1000:
-            issues.append({"type":"duration-too-long","severity":"warning","index":s.index,"time":s.start_ms,
-                           "message":f"Duration {s.duration_ms}ms above {max_d}s"})
+        if min_ms and dur < min_ms:
+            issues_append({"type":"duration-too-short","severity":"warning","index":s.index,"time":s.start_ms,
+                           "message":f"Duration {dur}ms below {min_d}s"})
+        if max_ms and dur > max_ms:
+            issues_append({"type":"duration-too-long","severity":"warning","index":s.index,"time":s.start_ms,
+                           "message":f"Duration {dur}ms above {max_d}s"})
         # line count
-        if len(s.lines) > profile.get('maxLines', 2):
-            issues.append({"type":"too-many-lines","severity":"error","index":s.index,"time":s.start_ms,
-                           "message":f"{len(s.lines)} lines (max {profile.get('maxLines',2)})"})
+        if n_lines > max_lines:
+            issues_append({"type":"too-many-lines","severity":"error","index":s.index,"time":s.start_ms,
+                           "message":f"{n_lines} lines (max {max_lines})"})
         # CPL
-        max_cpl = profile.get('maxCpl')
-        min_cpl = profile.get('minCpl')
-        for li, line in enumerate(s.lines, start=1):
+        for li, line in enumerate(lines, start=1):
             L = len(line)
             if max_cpl and L > max_cpl:
-                issues.append({"type":"cpl-exceeded","severity":"warning","index":s.index,"line":li,
+                issues_append({"type":"cpl-exceeded","severity":"warning","index":s.index,"line":li,
                                "time":s.start_ms,"message":f"{L} > {max_cpl} chars"})
-            if min_cpl and L < min_cpl and len(s.lines)==2:
+            if min_cpl and L < min_cpl and n_lines==2:
                 # informational: highly uneven lines
-                issues.append({"type":"cpl-low" ,"severity":"info","index":s.index,"line":li,
+                issues_append({"type":"cpl-low" ,"severity":"info","index":s.index,"line":li,
                                "time":s.start_ms,"message":f"{L} < {min_cpl} chars (balance lines if possible)"})
         # CPS
-        target_cps = profile.get('targetCps')
         if target_cps:
-            c = cps(s.text.replace('
-',' '), s.duration_ms)
+            # newline->space replacement doesn't change the length, so count directly
+            c = n_chars / (dur/1000.0) if dur > 0 else float('inf')
             if c > target_cps:
                 over_cps += 1
-                issues.append({"type":"cps-high","severity":"warning","index":s.index,"time":s.start_ms,
+                issues_append({"type":"cps-high","severity":"warning","index":s.index,"time":s.start_ms,
                                "message":f"CPS {c:.1f} > target {target_cps}"})
         # Swedish ellipsis rule if specified
-        ell = profile.get('ellipsis', {})
-        if ell:
+        if check_ellipsis:
             if '...' in s.text:
-                issues.append({"type":"ellipsis-three-dots","severity":"info","index":s.index,"time":s.start_ms,
+                issues_append({"type":"ellipsis-three-dots","severity":"info","index":s.index,"time":s.start_ms,
                                "message":"Use single ellipsis character … (U+2026)"})
         # Dual speaker dash
-        if profile.get('dualSpeakerDash') and len(s.lines)==2:
+        if check_dual_dash and n_lines==2:
             # if both lines look like dialogue by two speakers but not prefixed with dash
             needs = []
-            for line in s.lines:
+            for line in lines:
                 if line.strip().startswith('-'):
                     continue
                 # naive heuristic: treat colon or quote as speaker lead, else require dash
                 needs.append(True)
             if all(needs):
-                issues.append({"type":"missing-dual-speaker-dash","severity":"info","index":s.index,"time":s.start_ms,
+                issues_append({"type":"missing-dual-speaker-dash","severity":"info","index":s.index,"time":s.start_ms,
                                "message":"Add hyphen at start of each line for two speakers"})
     avg_cps = (total_chars/(total_duration/1000.0)) if total_duration>0 else 0
     metrics = {"avgCPS": round(avg_cps,2), "count": len(subs), "overCPS": over_cps}
     return issues, metrics
 
 
+def _normalize_ellipsis(t: str, desired: str, strip_ws: bool) -> str:
+    # str.replace returns t itself when there is no '...', and the whitespace
+    # pass only runs when there is an ellipsis to tighten, so most cues cost
+    # one C-level scan instead of a replace plus a regex pass
+    t = t.replace('...', desired)
+    if strip_ws and '…' in t:
+        t = _ELLIPSIS_WS_RE.sub('…', t)
+    return t
+
+
+def _reflow(line, max_cpl, out):
+    # Walk the line once by index: each cut searches only the next max_cpl
+    # window instead of slicing off (and re-copying) the remainder every pass
+    n = len(line)
+    start = 0
+    while n - start > max_cpl:
+        cut = line.rfind(' ', start, start + max_cpl)
+        if cut == -1:
+            cut = start + max_cpl
+        out.append(line[start:cut].rstrip())
+        start = cut
+        while start < n and line[start].isspace():
+            start += 1
+    out.append(line[start:])
+
+
 def safe_fixes(subs, profile):
     # Apply limited, deterministic fixes
     max_cpl = profile.get('maxCpl')
@@ -284,14 +478,10 @@ def safe_fixes(subs, profile):
         if max_cpl:
             new_lines = []
             for line in s.lines:
-                ln = line
-                while len(ln) > max_cpl:
-                    cut = ln.rfind(' ', 0, max_cpl)
-                    if cut == -1:
-                        cut = max_cpl
-                    new_lines.append(ln[:cut].rstrip())
-                    ln = ln[cut:].lstrip()
-                new_lines.append(ln)
+                if len(line) > max_cpl:
+                    _reflow(line, max_cpl, new_lines)
+                else:
+                    new_lines.append(line)
             # ensure at most 2 lines; if more, join tail lines
             if len(new_lines) > 2:
                 head = new_lines[:1]
@@ -303,14 +493,10 @@ def safe_fixes(subs, profile):
         # ellipsis normalization
         ell = profile.get('ellipsis', {})
         if ell:
-            desired = ell.get('char', '…')
             t = s.text
-            t2 = t.replace('...', desired)
-            if ell.get('noSpacesWithinSentence', False):
-                t2 = re.sub(r"\s*…\s*", '…', t2)
+            t2 = _normalize_ellipsis(t, ell.get('char', '…'), ell.get('noSpacesWithinSentence', False))
             if t2 != t:
-                s.lines = t2.split('
-')
+                s.lines = t2.split('\n')
                 ch.append('ellipsis')
         # dual speaker dash addition
         if profile.get('dualSpeakerDash') and len(s.lines)==2:
@@ -324,29 +510,36 @@ def safe_fixes(subs, profile):
     return changed
 
 
+def _fmt_srt_ts(ms: int) -> str:
+    s, ms2 = divmod(ms, 1000)
+    m, ss = divmod(s, 60)
+    h, mm = divmod(m, 60)
+    return f"{h:02d}:{mm:02d}:{ss:02d},{ms2:03d}"
+
+
 def serialize_srt(subs):
+    # Cues carry a variable number of lines, so the list cannot be presized;
+    # binding the methods keeps the per-cue cost to plain calls
     out = []
-    def fmt(ms):
-        s = ms//1000
-        ms2 = ms%1000
-        h = s//3600
-        m = (s%3600)//60
-        ss = s%60
-        return f"{h:02d}:{m:02d}:{ss:02d},{ms2:03d}"
+    append = out.append
+    extend = out.extend
+    fmt = _fmt_srt_ts
     for s in subs:
-        out.append(str(s.index))
-        out.append(f"{fmt(s.start_ms)} --> {fmt(s.end_ms)}")
-        out.extend(s.lines)
-        out.append("")
-    return "
-".join(out)
+        append(str(s.index))
+        append(f"{fmt(s.start_ms)} --> {fmt(s.end_ms)}")
+        extend(s.lines)
+        append("")
+    return "\n".join(out)
 
 
 def generate_html_report(issues, metrics, profile_name, sources):
+    esc = html.escape
     rows = []
+    append = rows.append
     for it in issues[:200]:
-        rows.append(f"<tr><td>{html.escape(it.get('severity',''))}</td><td>{html.escape(it.get('type',''))}</td><td>{it.get('index')}</td><td>{it.get('time')}</td><td>{html.escape(it.get('message',''))}</td></tr>")
-    refs = ''.join([f"<li><a href='{html.escape(u)}' target='_blank'>{html.escape(u)}</a></li>" for u in sources])
+        get = it.get
+        append(f"<tr><td>{esc(get('severity',''))}</td><td>{esc(get('type',''))}</td><td>{get('index')}</td><td>{get('time')}</td><td>{esc(get('message',''))}</td></tr>")
+    refs = ''.join([f"<li><a href='{u}' target='_blank'>{u}</a></li>" for u in map(esc, sources)])
     return f"""
 <!doctype html>
 <html><head><meta charset='utf-8'><title>QC Report</title>